@@ -1,6 +1,28 @@
+import time
+STARTUP_STARTED = time.perf_counter()
+import threading
 import flet as ft
 from src.ui.main_view import MainView
 
+WARM_UP_IN_BACKGROUND = True  # Preload pandas, the optimizer and the embedding model after the first paint
+IMPORTS_DONE = time.perf_counter()
+
+def warm_up(main_view, preload=WARM_UP_IN_BACKGROUND):
+    # Stored catalog first (cheap), then the heavy optimizer dependencies and the model
+    timings = {}
+    started = time.perf_counter()
+    main_view.load_catalog()
+    timings['catalog'] = time.perf_counter() - started
+    if preload:
+        started = time.perf_counter()
+        import src.optimizer.optimization_script
+        timings['optimizer imports'] = time.perf_counter() - started
+        started = time.perf_counter()
+        from src.optimizer.semantic_search import get_model
+        get_model()
+        timings['embedding model'] = time.perf_counter() - started
+    print("DEBUG: Background warm-up - " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items()))
+
 def main(page: ft.Page):
     page.title = "Supermarket Product Optimizer"
     page.theme_mode = ft.ThemeMode.LIGHT
@@ -10,6 +32,8 @@ def main(page: ft.Page):
     page.padding = 20
     page.window_icon = "icon.png"
     
+    main_view = MainView(page)
+
     def route_change(route):
         page.views.clear()
         page.views.append(
@@ -18,7 +42,7 @@ def main(page: ft.Page):
                 [ 
                     ft.Column(
                         [
-                            MainView(page)
+                            main_view
                         ],
                         scroll=ft.ScrollMode.ALWAYS,  # Enable scrolling for the column
                         expand=True
@@ -33,4 +57,8 @@ def main(page: ft.Page):
     page.on_route_change = route_change
     page.go('/')
 
+    window_ready = time.perf_counter()
+    print(f"DEBUG: Startup - imports {IMPORTS_DONE - STARTUP_STARTED:.2f}s, window ready after {window_ready - STARTUP_STARTED:.2f}s")
+    threading.Thread(target=warm_up, args=(main_view,), daemon=True).start()
+
 ft.app(target=main)
\ No newline at end of file
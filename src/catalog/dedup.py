@@ -0,0 +1,47 @@
+import re
+import unicodedata
+import numpy as np
+import pandas as pd
+from src.optimizer.features import SIZE_PATTERN, clean_price, extract_weight_lb
+from src.scraper.incremental import product_id
+
+def normalize_name(name):
+    # Lowercase, accents and punctuation stripped, size removed (it is compared separately, in lb)
+    name = unicodedata.normalize('NFKD', str(name or ''))
+    name = ''.join(char for char in name if not unicodedata.combining(char)).lower()
+    name = SIZE_PATTERN.sub(' ', name)
+    return ' '.join(re.sub(r'[^\w]+', ' ', name).split())
+
+def optional_round(value, digits):
+    return None if pd.isna(value) else round(float(value), digits)
+
+def dedup_keys(df):
+    prices = clean_price(df['price'])
+    weights = extract_weight_lb(df['name'])
+    return [
+        (normalize_name(name), optional_round(price, 2), optional_round(weight, 4))
+        for name, price, weight in zip(df['name'], prices, weights)
+    ]
+
+def deduplicate(df):
+    # Hash index on (normalized name, price, size): the first listing is kept and the IDs
+    # of the others are recorded in its alias_ids. Returns (unique frame, kept row positions).
+    if df.empty or 'name' not in df.columns:
+        return df, np.arange(len(df))
+    ids = [product_id(link) if isinstance(link, str) else None for link in df.get('link', [None] * len(df))]
+    index = {}
+    kept = []
+    aliases = []
+    for position, key in enumerate(dedup_keys(df)):
+        first = index.get(key)
+        if first is None:
+            index[key] = len(kept)
+            kept.append(position)
+            aliases.append([])
+        elif ids[position] is not None:
+            aliases[first].append(ids[position])
+    kept = np.array(kept, dtype=np.int64)
+    unique = df.iloc[kept].reset_index(drop=True)
+    unique['alias_ids'] = aliases
+    print(f"DEBUG: Deduplicated {len(df)} products to {len(unique)} unique items")
+    return unique, kept
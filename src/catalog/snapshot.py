@@ -0,0 +1,69 @@
+import os
+import numpy as np
+import pandas as pd
+from src.optimizer.features import extract_features
+from src.scraper.common import FIELDNAMES
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:
+    pa = None
+
+# Scraped fields followed by the derived features, with typed price columns
+SNAPSHOT_FIELDS = FIELDNAMES + ['effective_price', 'weight_lb', 'lb_per_dollar']
+TEXT_FIELDS = {'name', 'price_by_weight', 'link', 'image_url'}
+
+def snapshot_path(csv_path):
+    # all_products.csv -> all_products.arrow
+    return os.path.splitext(csv_path)[0] + '.arrow'
+
+def snapshot_table(products, embeddings=None):
+    df = extract_features(pd.DataFrame(products, columns=FIELDNAMES))
+    columns = {}
+    for field in SNAPSHOT_FIELDS:
+        if field in TEXT_FIELDS:
+            columns[field] = pa.array(df[field].astype(object).where(df[field].notna(), None).tolist(), type=pa.string())
+        else:
+            columns[field] = pa.array(df[field].to_numpy(dtype=np.float64), type=pa.float64())
+    if embeddings is not None:
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        columns['embedding'] = pa.FixedSizeListArray.from_arrays(pa.array(embeddings.reshape(-1)), embeddings.shape[1])
+    return pa.table(columns)
+
+def write_snapshot(products, path, embeddings=None):
+    # Uncompressed Arrow IPC file, so readers can memory-map the columns instead of parsing them
+    if pa is None:
+        print("DEBUG: pyarrow is not installed, skipping columnar snapshot")
+        return False
+    table = snapshot_table(products, embeddings)
+    tmp_path = path + '.tmp'
+    try:
+        with pa.OSFile(tmp_path, 'wb') as sink, ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        # Fails on Windows while a reader still maps the old file; callers release it first
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    print(f"DEBUG: Wrote columnar snapshot of {table.num_rows} products to {path}")
+    return True
+
+def load_snapshot(path):
+    # Returns (DataFrame, embeddings or None); numeric columns and embeddings are views over the mapped file
+    if pa is None or not os.path.exists(path):
+        return None, None
+    try:
+        table = ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    except Exception as e:
+        print(f"Error loading columnar snapshot {path}: {e}")
+        return None, None
+    embeddings = None
+    if 'embedding' in table.column_names:
+        column = table.column('embedding').combine_chunks()
+        embeddings = column.values.to_numpy(zero_copy_only=True).reshape(len(column), column.type.list_size)
+        table = table.drop_columns(['embedding'])
+    df = table.to_pandas(split_blocks=True, self_destruct=True)
+    print(f"DEBUG: Loaded columnar snapshot of {len(df)} products from {path}")
+    return df, embeddings
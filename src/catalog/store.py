@@ -0,0 +1,119 @@
+import math
+import sqlite3
+import threading
+import time
+from src.scraper.common import FIELDNAMES
+from src.scraper.incremental import product_id
+
+DEFAULT_DB_PATH = 'catalog.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    product_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    price REAL,
+    old_price REAL,
+    effective_price REAL,
+    price_by_weight TEXT,
+    weight_lb REAL,
+    lb_per_dollar REAL,
+    link TEXT,
+    image_url TEXT,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_products_price ON products(price);
+CREATE INDEX IF NOT EXISTS idx_products_effective_price ON products(effective_price);
+CREATE INDEX IF NOT EXISTS idx_products_lb_per_dollar ON products(lb_per_dollar);
+"""
+
+UPSERT = """
+INSERT INTO products (product_id, name, price, old_price, effective_price, price_by_weight, weight_lb, lb_per_dollar, link, image_url, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(product_id) DO UPDATE SET
+    name = excluded.name,
+    price = excluded.price,
+    old_price = excluded.old_price,
+    effective_price = excluded.effective_price,
+    price_by_weight = excluded.price_by_weight,
+    weight_lb = excluded.weight_lb,
+    lb_per_dollar = excluded.lb_per_dollar,
+    link = excluded.link,
+    image_url = excluded.image_url,
+    updated_at = excluded.updated_at
+"""
+
+def is_missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+def optional_float(value):
+    return None if is_missing(value) else float(value)
+
+def optional_text(value):
+    return None if is_missing(value) else str(value)
+
+# SQLite-backed product catalog keyed by product ID, with derived price/weight columns
+# indexed so candidate filtering can run as a query instead of in pandas.
+class CatalogStore:
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        with self.lock, self.connection:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.executescript(SCHEMA)
+
+    def upsert_products(self, products):
+        if not products:
+            return 0
+        # pandas is only needed once products are written, not to open the store
+        import pandas as pd
+        from src.optimizer.features import extract_features
+        df = extract_features(pd.DataFrame(products, columns=FIELDNAMES))
+        now = time.time()
+        rows = [
+            (
+                product_id(row.link), row.name, optional_float(row.price), optional_float(row.old_price),
+                optional_float(row.effective_price), optional_text(row.price_by_weight), optional_float(row.weight_lb),
+                optional_float(row.lb_per_dollar), row.link, optional_text(row.image_url), now,
+            )
+            for row in df.itertuples(index=False)
+        ]
+        with self.lock, self.connection:
+            self.connection.executemany(UPSERT, rows)
+        print(f"Upserted {len(rows)} products into {self.db_path}")
+        return len(rows)
+
+    def load_products(self, max_price=None, product_ids=None, order_by_lb_per_dollar=False):
+        # Candidate filtering runs on the indexes: effective_price for the budget, the primary key for the scope,
+        # lb_per_dollar for the greedy order
+        columns = ', '.join(f'p.{field}' for field in FIELDNAMES)
+        query = f"SELECT {columns} FROM products p"
+        params = []
+        with self.lock:
+            if product_ids is not None:
+                # Committed right away so no implicit transaction keeps holding a WAL read snapshot
+                with self.connection:
+                    self.connection.execute('CREATE TEMP TABLE IF NOT EXISTS scope (product_id TEXT PRIMARY KEY)')
+                    self.connection.execute('DELETE FROM scope')
+                    self.connection.executemany('INSERT OR IGNORE INTO scope VALUES (?)', ((key,) for key in product_ids))
+                query += " JOIN scope s ON s.product_id = p.product_id"
+            if max_price is not None:
+                query += " WHERE p.effective_price <= ?"
+                params.append(max_price)
+            query += " ORDER BY p.lb_per_dollar DESC" if order_by_lb_per_dollar else " ORDER BY p.rowid"
+            rows = self.connection.execute(query, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def last_updated(self):
+        # Time of the most recent upsert, or None for an empty store
+        with self.lock:
+            return self.connection.execute('SELECT MAX(updated_at) FROM products').fetchone()[0]
+
+    def count(self):
+        with self.lock:
+            return self.connection.execute('SELECT COUNT(*) FROM products').fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
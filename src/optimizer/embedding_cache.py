@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import threading
+import numpy as np
+
+DEFAULT_CACHE_DIR = '.embedding_cache'
+ENCODE_CHUNK_SIZE = 256  # Texts per model.encode call; progress (and cancellation) is checked between chunks
+
+def text_key(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def product_text(product):
+    # Text a product is embedded from; shared by indexing and snapshot writing
+    return f"{product['name']} {product.get('description', '')}"
+
+def encode_chunks(model, texts, on_progress=None, chunk_size=ENCODE_CHUNK_SIZE):
+    # Yields embeddings chunk by chunk; on_progress(done, total) runs after each chunk has been
+    # handed over, so a callback that raises to cancel does not lose the chunk
+    for start in range(0, len(texts), chunk_size):
+        vectors = np.asarray(model.encode(texts[start:start + chunk_size]), dtype=np.float32)
+        yield vectors
+        if on_progress is not None:
+            on_progress(start + len(vectors), len(texts))
+
+# Content-addressed embedding store: sha1(text) -> row of a memory-mapped .npy matrix,
+# so re-indexing a catalog only encodes products whose text is new or changed.
+class EmbeddingCache:
+    def __init__(self, model_name, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        safe_name = model_name.replace('/', '_')
+        self.vectors_path = os.path.join(cache_dir, f"{safe_name}.npy")
+        self.keys_path = os.path.join(cache_dir, f"{safe_name}.keys.json")
+        self.keys = {}
+        self.vectors = None
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if not (os.path.exists(self.vectors_path) and os.path.exists(self.keys_path)):
+            return
+        try:
+            with open(self.keys_path, 'r', encoding='utf-8') as f:
+                keys = json.load(f)
+            vectors = np.load(self.vectors_path, mmap_mode='r')
+            if len(keys) != vectors.shape[0]:
+                print(f"DEBUG: Embedding cache at {self.cache_dir} is inconsistent, ignoring it")
+                return
+            self.keys = keys
+            self.vectors = vectors
+            print(f"DEBUG: Loaded {len(keys)} cached embeddings from {self.vectors_path}")
+        except Exception as e:
+            print(f"Error loading embedding cache: {e}")
+
+    def encode(self, texts, model, on_progress=None):
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        keys = [text_key(text) for text in texts]
+        with self.lock:
+            missing = {}
+            for key, text in zip(keys, texts):
+                if key not in self.keys and key not in missing:
+                    missing[key] = text
+
+            if missing:
+                missing_keys = list(missing.keys())
+                encoded = []
+                try:
+                    for vectors in encode_chunks(model, list(missing.values()), on_progress):
+                        encoded.append(vectors)
+                finally:
+                    # Chunks encoded before a cancellation are kept, so the next run skips them
+                    if encoded:
+                        new_vectors = np.concatenate(encoded)
+                        self.append(missing_keys[:len(new_vectors)], new_vectors)
+            print(f"DEBUG: Embedding cache - {len(texts) - len(missing)} hits, {len(missing)} encoded")
+
+            rows = np.fromiter((self.keys[key] for key in keys), dtype=np.int64, count=len(keys))
+            return np.array(self.vectors[rows], dtype=np.float32)
+
+    def lookup(self, texts):
+        # Cached embeddings for texts without encoding anything; None unless every text is cached
+        with self.lock:
+            keys = [text_key(text) for text in texts]
+            if not keys or self.vectors is None or any(key not in self.keys for key in keys):
+                return None
+            rows = np.fromiter((self.keys[key] for key in keys), dtype=np.int64, count=len(keys))
+            return np.array(self.vectors[rows], dtype=np.float32)
+
+    def append(self, new_keys, new_vectors):
+        if self.vectors is not None and len(self.vectors):
+            combined = np.concatenate([np.asarray(self.vectors), new_vectors])
+        else:
+            combined = new_vectors
+        offset = len(self.keys)
+        keys = dict(self.keys)
+        keys.update({key: offset + i for i, key in enumerate(new_keys)})
+
+        # Release the memory map before replacing the file (required on Windows)
+        self.vectors = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_vectors = self.vectors_path + '.tmp.npy'
+            tmp_keys = self.keys_path + '.tmp'
+            np.save(tmp_vectors, combined)
+            with open(tmp_keys, 'w', encoding='utf-8') as f:
+                json.dump(keys, f)
+            os.replace(tmp_vectors, self.vectors_path)
+            os.replace(tmp_keys, self.keys_path)
+            self.vectors = np.load(self.vectors_path, mmap_mode='r')
+        except Exception as e:
+            print(f"Error saving embedding cache: {e}")
+            self.vectors = combined
+        self.keys = keys
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_embedding_cache(model_name, cache_dir=DEFAULT_CACHE_DIR):
+    key = (model_name, os.path.abspath(cache_dir))
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = EmbeddingCache(model_name, cache_dir)
+        return _caches[key]
@@ -0,0 +1,59 @@
+import pandas as pd
+import numpy as np
+import re
+
+# Pounds per unit; liquids assume the density of water
+UNIT_TO_LB = {
+    'kg': 2.20462,
+    'g': 0.00220462,
+    'lb': 1.0,
+    'oz': 0.0625,
+    'l': 2.20462,
+    'ml': 0.00220462,
+}
+
+# Optional "N x" multipack prefix followed by the first size in the name, e.g. "6 x 116 g / 4.01 oz";
+# plural units ("5 lbs", "2 kgs") are accepted and singularized before the lookup
+SIZE_PATTERN = re.compile(r'(?:(\d+)\s*[x×]\s*)?(\d+(?:\.\d+)?)\s*(kgs?|lbs?|oz|ml|g|l)\b', re.IGNORECASE)
+PRICE_PER_LB_PATTERN = re.compile(r'\$(\d+(?:\.\d+)?)/lb', re.IGNORECASE)
+
+def clean_price(prices):
+    if pd.api.types.is_numeric_dtype(prices):
+        return prices.astype(float)
+    cleaned = prices.astype(str).str.replace(r'[$,]', '', regex=True).str.strip()
+    return pd.to_numeric(cleaned, errors='coerce')
+
+def extract_weight_lb(names):
+    sizes = names.fillna('').astype(str).str.extract(SIZE_PATTERN)
+    count = pd.to_numeric(sizes[0], errors='coerce').fillna(1.0)
+    amount = pd.to_numeric(sizes[1], errors='coerce')
+    factor = sizes[2].str.lower().str.rstrip('s').map(UNIT_TO_LB)
+    return (count * amount * factor).astype(float)
+
+def extract_price_per_lb(price_by_weight):
+    match = price_by_weight.astype(str).str.extract(PRICE_PER_LB_PATTERN)[0]
+    return pd.to_numeric(match, errors='coerce')
+
+def get_effective_price(df):
+    use_old_price = df['old_price'].notna() & (df['old_price'] < df['price'])
+    return df['old_price'].where(use_old_price, df['price'])
+
+def extract_features(df, default_weight=1.0):
+    # One column-wise pass over the catalog: prices, weights and lb per dollar
+    df['price'] = clean_price(df['price'])
+    df['old_price'] = clean_price(df['old_price'])
+    df['effective_price'] = get_effective_price(df)
+    df['weight_lb'] = extract_weight_lb(df['name'])
+
+    # Add a default weight for products without weight information
+    df['weight_lb'] = df['weight_lb'].fillna(default_weight)
+
+    df['price_per_lb'] = extract_price_per_lb(df['price_by_weight'])
+
+    # Calculate lb_per_dollar using the default weight if necessary
+    df['lb_per_dollar'] = np.where(
+        df['price_per_lb'].notna(),
+        1 / df['price_per_lb'],
+        df['weight_lb'] / df['effective_price']
+    )
+    return df
@@ -1,97 +1,70 @@
 import pandas as pd
 import numpy as np
-import re
+from .features import extract_features
 from .semantic_search import SemanticSearch, preprocess_query
+from src.catalog.dedup import deduplicate
 
-def clean_price(price):
-    if isinstance(price, str):
-        return float(price.replace('$', '').replace(',', '').strip())
-    elif isinstance(price, (int, float)):
-        return float(price)
-    else:
-        return np.nan
-
-def extract_weight_lb(name):
-    kg_match = re.search(r'(\d+(?:\.\d+)?)\s*kg', name, re.IGNORECASE)
-    lb_match = re.search(r'(\d+(?:\.\d+)?)\s*lb', name, re.IGNORECASE)
-    
-    if kg_match:
-        return float(kg_match.group(1)) * 2.20462  # Convert kg to lb
-    elif lb_match:
-        return float(lb_match.group(1))
-    else:
-        return np.nan
-
-def extract_price_per_lb(price_by_weight):
-    if isinstance(price_by_weight, str):
-        match = re.search(r'\$(\d+(?:\.\d+)?)/lb', price_by_weight, re.IGNORECASE)
-        if match:
-            return float(match.group(1))
-    return np.nan
-
-def get_effective_price(row):
-    if pd.notna(row.get('old_price')) and row['old_price'] < row['price']:
-        return row['old_price']
-    return row['price']
-
-def calculate_value_to_weight_ratio(row):
-    return row['weight_lb'] / row['effective_price'] if row['effective_price'] > 0 else 0
-
-def preprocess_data(products, exclude_words, budget, search_query, similarity_threshold=0.3):
+# Storage for the product embedding index: 'float32', 'float16' or 'int8'
+EMBEDDING_DTYPE = 'float32'
+quantization_checked = False  # A quantized index is compared against float32 once per process
+
+# Stages reported to progress callbacks, in the order optimize_all runs them
+OPTIMIZE_STAGES = ['embedding', 'exclusion', 'search', 'greedy', 'knapsack', 'ratio']
+
+class OptimizationCancelled(Exception):
+    pass
+
+def report_progress(progress_callback, stage, done=0, total=1):
+    # progress_callback(stage, done, total) may raise OptimizationCancelled to abort the job
+    if progress_callback is not None:
+        progress_callback(stage, done, total)
+
+def calculate_value_to_weight_ratio(df):
+    prices = df['effective_price'].to_numpy(dtype=float)
+    weights = df['weight_lb'].to_numpy(dtype=float)
+    ratio = np.zeros(len(df))
+    np.divide(weights, prices, out=ratio, where=prices > 0)
+    return ratio
+
+def preprocess_data(products, exclude_words, budget, search_query, similarity_threshold=0.3, top_k=10, embeddings=None, progress_callback=None):
     print(f"DEBUG: Preprocessing data with search query '{search_query}', budget ${budget}, and similarity threshold {similarity_threshold}")
-    df = pd.DataFrame(products)
+    # products may already be a DataFrame (columnar snapshot), in which case it is used as is
+    df = products if isinstance(products, pd.DataFrame) else pd.DataFrame(products)
     print(f"DEBUG: Initial product count: {len(df)}")
 
-    semantic_search = SemanticSearch(similarity_threshold=similarity_threshold)
-    semantic_search.index_products(df.to_dict('records'))
+    # Listings of the same item under several IDs are collapsed before any embedding or scoring work
+    df, kept = deduplicate(df)
+    if embeddings is not None:
+        embeddings = embeddings[kept]
+
+    report_progress(progress_callback, 'embedding')
+    semantic_search = SemanticSearch(similarity_threshold=similarity_threshold, embedding_dtype=EMBEDDING_DTYPE)
+    semantic_search.index_products(
+        df.to_dict('records'), embeddings,
+        on_progress=lambda done, total: report_progress(progress_callback, 'embedding', done, total),
+    )
+    global quantization_checked
+    if EMBEDDING_DTYPE != 'float32' and not quantization_checked:
+        quantization_checked = semantic_search.check_quantization(preprocess_query(search_query), top_k or 10) is not None
 
-    # Initial exclusion
+    # Compute the exclusion mask once over the indexed catalog and reuse it before and after search
+    report_progress(progress_callback, 'exclusion')
+    exclude_mask = semantic_search.exclude_mask(exclude_words)
     if exclude_words:
-        print(f"DEBUG: Applying exclusion for words: {exclude_words}")
-        df['exclude'] = df.apply(lambda row: semantic_search.check_exclude_similarity(
-            f"{row['name']} {row.get('description', '')}", 
-            exclude_words
-        ), axis=1)
-        df = df[~df['exclude']]
-        print(f"DEBUG: Product count after initial exclusion: {len(df)}")
-
-    search_results = semantic_search.search(preprocess_query(search_query))
+        print(f"DEBUG: Product count after exclusion: {int((~exclude_mask).sum())}")
+
+    report_progress(progress_callback, 'search')
+    search_results = semantic_search.search(preprocess_query(search_query), top_k=top_k, exclude_mask=exclude_mask)
     df = pd.DataFrame(search_results)
     print(f"DEBUG: Product count after semantic search: {len(df)}")
 
-    # Apply exclusion again after search
-    if exclude_words:
-        print(f"DEBUG: Reapplying exclusion for words after search: {exclude_words}")
-        df['exclude'] = df.apply(lambda row: semantic_search.check_exclude_similarity(
-            f"{row['name']} {row.get('description', '')}", 
-            exclude_words
-        ), axis=1)
-        df = df[~df['exclude']]
-        print(f"DEBUG: Product count after reapplying exclusion: {len(df)}")
-
     required_columns = ['name', 'price', 'old_price', 'price_by_weight', 'link', 'image_url']
     for col in required_columns:
         if col not in df.columns:
             df[col] = np.nan
             print(f"DEBUG: Added missing column '{col}'")
 
-    df['price'] = df['price'].apply(clean_price)
-    df['old_price'] = df['old_price'].apply(lambda x: clean_price(x) if pd.notna(x) else np.nan)
-    df['effective_price'] = df.apply(get_effective_price, axis=1)
-    df['weight_lb'] = df['name'].apply(extract_weight_lb)
-    
-    # Add a default weight for products without weight information
-    default_weight = 1.0  # You can adjust this value as needed
-    df['weight_lb'] = df['weight_lb'].fillna(default_weight)
-    
-    df['price_per_lb'] = df['price_by_weight'].apply(extract_price_per_lb)
-
-    # Calculate lb_per_dollar using the default weight if necessary
-    df['lb_per_dollar'] = np.where(
-        df['price_per_lb'].notna(),
-        1 / df['price_per_lb'],
-        df['weight_lb'] / df['effective_price']
-    )
+    df = extract_features(df)
 
     df = df[df['effective_price'] <= budget]
     print(f"DEBUG: Product count after budget filter: {len(df)}")
@@ -107,82 +80,164 @@ def preprocess_data(products, exclude_words, budget, search_query, similarity_th
 def get_top_3(df):
     return df.sort_values('lb_per_dollar', ascending=False).head(3).to_dict('records')
 
-def optimize_purchase_greedy(products, budget, exclude_words, search_query, similarity_threshold=0.3):
+def build_basket(df, quantities):
+    # Compact result: one (product, quantity) pair per distinct product instead of one dict per unit
+    indices = np.flatnonzero(quantities)
+    basket = [(df.iloc[i].to_dict(), int(quantities[i])) for i in indices]
+    total_price = float(np.dot(df['effective_price'].to_numpy(dtype=float)[indices], quantities[indices]))
+    total_weight = float(np.dot(df['weight_lb'].to_numpy(dtype=float)[indices], quantities[indices]))
+    return basket, total_price, total_weight
+
+def fill_in_order(prices, budget, resolution=100):
+    # Buy as many units as fit of each product in the given order; one integer division per product.
+    # Works in cents, like run_knapsack_unbounded, so a basket that spends the budget exactly still fits.
+    costs = np.round(np.asarray(prices, dtype=float) * resolution).astype(np.int64)
+    remaining = int(round(budget * resolution))
+    quantities = np.zeros(len(costs), dtype=np.int64)
+    for i, cost in enumerate(costs.tolist()):
+        if cost <= 0 or cost > remaining:
+            continue
+        quantities[i] = remaining // cost
+        remaining -= quantities[i] * cost
+    return quantities
+
+def run_greedy(df, budget):
     print(f"DEBUG: Starting greedy optimization with budget ${budget}")
-    df = preprocess_data(products, exclude_words, budget, search_query, similarity_threshold)
-    df = df.sort_values('lb_per_dollar', ascending=False).reset_index(drop=True)
+    df = df.sort_values('lb_per_dollar', ascending=False, kind='stable').reset_index(drop=True)
     
-    selected_products = []
-    total_weight = 0
-    total_price = 0
-
-    for _, product in df.iterrows():
-        quantity = int((budget - total_price) // product['effective_price'])
-        if quantity > 0:
-            for _ in range(quantity):
-                if total_price + product['effective_price'] <= budget:
-                    selected_products.append(product.to_dict())
-                    total_weight += product['weight_lb']
-                    total_price += product['effective_price']
-                else:
-                    break
-
+    quantities = fill_in_order(df['effective_price'].to_numpy(dtype=float), budget)
+    basket, total_price, total_weight = build_basket(df, quantities)
     top_3 = get_top_3(df)
-    print(f"DEBUG: Greedy optimization complete. Selected {len(selected_products)} products.")
-    return selected_products, total_weight, top_3
+    print(f"DEBUG: Greedy optimization complete. Selected {int(quantities.sum())} products.")
+    return basket, total_price, total_weight, top_3
+
+def knapsack_choices(costs, values, capacity, progress_callback=None):
+    # 0/1 knapsack over integer costs using a rolling 1-D value array; each item is one whole-array update.
+    # Returns the best value per capacity and a packed bitmap of which items improved which capacity.
+    best = np.zeros(capacity + 1)
+    choices = np.zeros((len(costs), (capacity + 8) // 8), dtype=np.uint8)
+    taken = np.zeros(capacity + 1, dtype=bool)
+    for i, (cost, value) in enumerate(zip(costs, values)):
+        report_progress(progress_callback, 'knapsack', i, len(costs))
+        if cost > capacity:
+            continue
+        candidate = best[:capacity + 1 - cost] + value
+        taken[:] = False
+        taken[cost:] = candidate > best[cost:]
+        best[cost:] = np.where(taken[cost:], candidate, best[cost:])
+        choices[i] = np.packbits(taken)
+    return best, choices
+
+def choice_taken(choices, i, w):
+    return (choices[i, w >> 3] >> (7 - (w & 7))) & 1
+
+def unbounded_knapsack(costs, values, capacity, progress_callback=None):
+    # Unbounded knapsack: any item may be taken several times. Each item is split into bundles of
+    # 1, 2, 4, ... copies and every bundle is one whole-array 0/1 update, so the work is O(n log capacity)
+    # NumPy passes. Only the value array and the last bundle that improved each capacity are kept.
+    best = np.zeros(capacity + 1)
+    last_bundle = np.full(capacity + 1, -1, dtype=np.int32)
+    bundle_items = []
+    bundle_counts = []
+    for i, (cost, value) in enumerate(zip(costs, values)):
+        if cost <= 0 or cost > capacity or not value > 0:
+            continue
+        count = 1
+        while count * cost <= capacity:
+            # Reported per bundle: with a large budget a single bundle pass is already expensive
+            report_progress(progress_callback, 'knapsack', i, len(costs))
+            shift = count * cost
+            candidate = best[:capacity + 1 - shift] + count * value
+            improved = candidate > best[shift:]
+            best[shift:] = np.where(improved, candidate, best[shift:])
+            last_bundle[shift:][improved] = len(bundle_items)
+            bundle_items.append(i)
+            bundle_counts.append(count)
+            count *= 2
+
+    # Any combination of bundles is a valid basket, so following the pointers rebuilds an optimum
+    quantities = np.zeros(len(costs), dtype=np.int64)
+    w = capacity
+    while w > 0 and last_bundle[w] >= 0:
+        bundle = last_bundle[w]
+        item = bundle_items[bundle]
+        quantities[item] += bundle_counts[bundle]
+        w -= bundle_counts[bundle] * costs[item]
+    return best[capacity], quantities
+
+def run_knapsack_unbounded(df, budget, resolution=100, progress_callback=None):
+    print(f"DEBUG: Starting unbounded knapsack optimization with budget ${budget}")
+    weights = df['effective_price'].to_numpy(dtype=float)
+    values = df['weight_lb'].to_numpy(dtype=float)
+
+    # Work in cents so prices are exact integer costs
+    costs = np.round(weights * resolution).astype(np.int64)
+    capacity = int(round(budget * resolution))
+    _, quantities = unbounded_knapsack(costs, values, capacity, progress_callback)
+
+    basket, total_price, total_weight = build_basket(df, quantities)
+    top_3 = get_top_3(df)
+    print(f"DEBUG: Unbounded knapsack optimization complete. Selected {int(quantities.sum())} products.")
+    return basket, total_price, total_weight, top_3
 
-def optimize_purchase_knapsack(products, budget, exclude_words, search_query, similarity_threshold=0.3):
+def run_knapsack(df, budget, mode='0/1', progress_callback=None):
+    if mode == 'unbounded':
+        return run_knapsack_unbounded(df, budget, progress_callback=progress_callback)
     print(f"DEBUG: Starting knapsack optimization with budget ${budget}")
-    df = preprocess_data(products, exclude_words, budget, search_query, similarity_threshold)
     n = len(df)
-    weights = df['effective_price'].tolist()
-    values = df['weight_lb'].tolist()
-    
-    dp = [[0 for _ in range(int(budget) + 1)] for _ in range(n + 1)]
-    
-    for i in range(1, n + 1):
-        for w in range(int(budget) + 1):
-            if weights[i-1] <= w:
-                dp[i][w] = max(values[i-1] + dp[i-1][int(w-weights[i-1])], dp[i-1][w])
-            else:
-                dp[i][w] = dp[i-1][w]
-    
-    selected_products = []
-    total_weight = 0
-    w = int(budget)
-    for i in range(n, 0, -1):
-        if dp[i][w] != dp[i-1][w]:
-            quantity = int(w // weights[i-1])
-            for _ in range(quantity):
-                selected_products.append(df.iloc[i-1].to_dict())
-                total_weight += values[i-1]
-                w -= int(weights[i-1])
-    
+    weights = df['effective_price'].to_numpy(dtype=float)
+    values = df['weight_lb'].to_numpy(dtype=float)
+    capacity = int(budget)
+
+    # A price p fits in capacity w exactly when ceil(p) <= w, and leaves int(w - p) == w - ceil(p)
+    costs = np.ceil(weights).astype(np.int64)
+    _, choices = knapsack_choices(costs, values, capacity, progress_callback)
+
+    quantities = np.zeros(n, dtype=np.int64)
+    w = capacity
+    for i in range(n - 1, -1, -1):
+        if choice_taken(choices, i, w):
+            quantity = int(w // weights[i])
+            quantities[i] = quantity
+            w -= quantity * int(weights[i])
+
+    basket, total_price, total_weight = build_basket(df, quantities)
     top_3 = get_top_3(df)
-    print(f"DEBUG: Knapsack optimization complete. Selected {len(selected_products)} products.")
-    return selected_products, total_weight, top_3
+    print(f"DEBUG: Knapsack optimization complete. Selected {int(quantities.sum())} products.")
+    return basket, total_price, total_weight, top_3
 
-def optimize_purchase_ratio(products, budget, exclude_words, search_query, similarity_threshold=0.3):
+def run_ratio(df, budget):
     print(f"DEBUG: Starting ratio-based optimization with budget ${budget}")
-    df = preprocess_data(products, exclude_words, budget, search_query, similarity_threshold)
-    df['value_to_weight_ratio'] = df.apply(calculate_value_to_weight_ratio, axis=1)
+    df = df.copy()
+    df['value_to_weight_ratio'] = calculate_value_to_weight_ratio(df)
     df = df.sort_values('value_to_weight_ratio', ascending=False).reset_index(drop=True)
     
-    selected_products = []
-    total_weight = 0
-    total_price = 0
-
-    for _, product in df.iterrows():
-        quantity = int((budget - total_price) // product['effective_price'])
-        if quantity > 0:
-            for _ in range(quantity):
-                if total_price + product['effective_price'] <= budget:
-                    selected_products.append(product.to_dict())
-                    total_weight += product['weight_lb']
-                    total_price += product['effective_price']
-                else:
-                    break
-
+    quantities = fill_in_order(df['effective_price'].to_numpy(dtype=float), budget)
+    basket, total_price, total_weight = build_basket(df, quantities)
     top_3 = get_top_3(df)
-    print(f"DEBUG: Ratio-based optimization complete. Selected {len(selected_products)} products.")
-    return selected_products, total_weight, top_3
\ No newline at end of file
+    print(f"DEBUG: Ratio-based optimization complete. Selected {int(quantities.sum())} products.")
+    return basket, total_price, total_weight, top_3
+
+def optimize_purchase_greedy(products, budget, exclude_words, search_query, similarity_threshold=0.3):
+    df = preprocess_data(products, exclude_words, budget, search_query, similarity_threshold)
+    return run_greedy(df, budget)
+
+def optimize_purchase_knapsack(products, budget, exclude_words, search_query, similarity_threshold=0.3, mode='0/1'):
+    df = preprocess_data(products, exclude_words, budget, search_query, similarity_threshold)
+    return run_knapsack(df, budget, mode)
+
+def optimize_purchase_ratio(products, budget, exclude_words, search_query, similarity_threshold=0.3):
+    df = preprocess_data(products, exclude_words, budget, search_query, similarity_threshold)
+    return run_ratio(df, budget)
+
+def optimize_all(products, budget, exclude_words, search_query, similarity_threshold=0.3, knapsack_mode='0/1', embeddings=None, progress_callback=None, top_k=10):
+    # Build the candidate frame once and feed it to every strategy; top_k=None keeps every match above the threshold
+    df = preprocess_data(products, exclude_words, budget, search_query, similarity_threshold, top_k, embeddings, progress_callback)
+    report_progress(progress_callback, 'greedy')
+    greedy_results = run_greedy(df, budget)
+    report_progress(progress_callback, 'knapsack')
+    knapsack_results = run_knapsack(df, budget, knapsack_mode, progress_callback)
+    report_progress(progress_callback, 'ratio')
+    ratio_results = run_ratio(df, budget)
+    report_progress(progress_callback, 'ratio', 1, 1)
+    return greedy_results, knapsack_results, ratio_results
@@ -1,64 +1,251 @@
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
-from langdetect import detect
-from fuzzywuzzy import fuzz
+import threading
+from collections import OrderedDict
+from .embedding_cache import encode_chunks, get_embedding_cache, product_text
+
+try:
+    from rapidfuzz import fuzz as rapid_fuzz, process as rapid_process
+except ImportError:
+    rapid_process = None
+
+MODEL_NAME = 'paraphrase-multilingual-MiniLM-L12-v2'
+
+# Process-wide model registry: every SemanticSearch shares one encoder per (name, device)
+_models = {}
+_models_lock = threading.Lock()
+
+def get_model(model_name=MODEL_NAME, device='cpu'):
+    key = (model_name, device)
+    model = _models.get(key)
+    if model is None:
+        with _models_lock:
+            model = _models.get(key)
+            if model is None:
+                # Imported here: sentence_transformers pulls in torch, which dominates startup time
+                from sentence_transformers import SentenceTransformer
+                print(f"DEBUG: Loading SentenceTransformer model '{model_name}' on {device}")
+                model = SentenceTransformer(model_name, device=device)
+                _models[key] = model
+    return model
+
+# Bounded LRU of short text (query / exclude term) -> embedding, with hit and miss counters
+class TermEmbeddingCache:
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def encode(self, terms, model):
+        with self.lock:
+            missing = []
+            for term in terms:
+                if term in self.entries:
+                    self.entries.move_to_end(term)
+                    self.hits += 1
+                elif term not in missing:
+                    missing.append(term)
+                    self.misses += 1
+            if missing:
+                for term, embedding in zip(missing, model.encode(missing)):
+                    self.entries[term] = embedding
+                while len(self.entries) > self.maxsize:
+                    self.entries.popitem(last=False)
+            # Terms evicted by this very call are encoded again rather than failing
+            embeddings = [self.entries[term] if term in self.entries else model.encode([term])[0] for term in terms]
+            return np.array(embeddings, dtype=np.float32)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+_term_caches = {}
+_term_caches_lock = threading.Lock()
+
+def get_term_cache(model_name=MODEL_NAME):
+    with _term_caches_lock:
+        if model_name not in _term_caches:
+            _term_caches[model_name] = TermEmbeddingCache()
+        return _term_caches[model_name]
+
+def fuzzy_scores(query, choices, workers=1):
+    # partial_ratio of one query against every choice, as a [0, 1] float array aligned with choices
+    if not choices:
+        return np.zeros(0, dtype=np.float32)
+    if rapid_process is not None:
+        scores = rapid_process.cdist([query], choices, scorer=rapid_fuzz.partial_ratio, workers=workers)[0]
+    else:
+        from fuzzywuzzy import fuzz
+        scores = np.fromiter((fuzz.partial_ratio(query, choice) for choice in choices), dtype=np.float32, count=len(choices))
+    return np.asarray(scores, dtype=np.float32) / 100
+
+def normalize_rows(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+def quantize_embeddings(embeddings, dtype='float32'):
+    # Returns (matrix, per-row scales); scales is None unless the matrix is symmetric int8
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if dtype == 'float32':
+        return embeddings, None
+    if dtype == 'float16':
+        return embeddings.astype(np.float16), None
+    if dtype == 'int8':
+        scales = np.abs(embeddings).max(axis=1) / 127 if len(embeddings) else np.zeros(0, dtype=np.float32)
+        scales = np.where(scales > 0, scales, 1).astype(np.float32)
+        quantized = np.clip(np.rint(embeddings / scales[:, None]), -127, 127).astype(np.int8)
+        return quantized, scales
+    raise ValueError(f"Unsupported embedding dtype: {dtype}")
 
 class SemanticSearch:
-    def __init__(self, similarity_threshold=0.3):
-        self.model = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2', device='cpu')
+    def __init__(self, similarity_threshold=0.3, use_embedding_cache=True, fuzzy_workers=1, block_size=8192, embedding_dtype='float32'):
+        self.model = get_model()
+        self.embedding_cache = get_embedding_cache(MODEL_NAME) if use_embedding_cache else None
+        self.term_cache = get_term_cache(MODEL_NAME)
+        self.fuzzy_workers = fuzzy_workers
+        self.block_size = block_size
+        self.embedding_dtype = embedding_dtype
         self.product_embeddings = None
+        self.embedding_scales = None
         self.products = None
+        self.product_names = []
+        self.product_descriptions = []
+        self.product_texts = []
         self.similarity_threshold = similarity_threshold
         print(f"DEBUG: SemanticSearch initialized with threshold {similarity_threshold}")
 
-    def index_products(self, products):
+    def index_products(self, products, embeddings=None, on_progress=None):
+        # embeddings, when given, are precomputed rows aligned with products (e.g. from a columnar snapshot);
+        # otherwise products are encoded in chunks with on_progress(done, total) called between them
         self.products = products
-        texts = [f"{p['name']} {p.get('description', '')}" for p in products]
-        self.product_embeddings = self.model.encode(texts)
-        print(f"DEBUG: Indexed {len(products)} products")
+        texts = [product_text(p) for p in products]
+        # Normalized strings for fuzzy matching are built once per index, not per query
+        self.product_names = [p['name'].lower() for p in products]
+        self.product_descriptions = [p.get('description', '').lower() for p in products]
+        self.product_texts = [text.lower() for text in texts]
+        # Unit-length rows so cosine similarity is a plain dot product
+        if embeddings is None or len(embeddings) != len(products):
+            embeddings = self.encode_products(texts, on_progress)
+        embeddings = normalize_rows(embeddings)
+        self.product_embeddings, self.embedding_scales = quantize_embeddings(embeddings, self.embedding_dtype)
+        print(f"DEBUG: Indexed {len(products)} products as {self.embedding_dtype} ({self.product_embeddings.nbytes} bytes)")
+
+    def encode_products(self, texts, on_progress=None):
+        if self.embedding_cache is not None:
+            return self.embedding_cache.encode(texts, self.model, on_progress)
+        chunks = list(encode_chunks(self.model, texts, on_progress))
+        return np.concatenate(chunks) if chunks else np.zeros((0, 0), dtype=np.float32)
+
+    def block_similarity(self, start, end, query_embeddings):
+        # Dot products of a block of (possibly quantized) product rows with normalized query rows
+        block = self.product_embeddings[start:end]
+        similarities = block.astype(np.float32) @ query_embeddings.T
+        if self.embedding_scales is not None:
+            similarities *= self.embedding_scales[start:end, None]
+        return similarities
 
-    def search(self, query, top_k=10):
+    def check_quantization(self, query, top_k=10):
+        # Compare rankings on the quantized index with float32 ones for the given query terms
+        query_terms = [term.strip() for term in query.split(',') if term.strip()]
+        if not query_terms or not self.products:
+            print(f"DEBUG: Skipping quantization check for '{query}': no query terms or no products")
+            return None
+        texts = [product_text(p) for p in self.products]
+        reference = normalize_rows(self.encode_products(texts))
+        query_embeddings = normalize_rows(self.encode_terms(query_terms))
+        exact = (reference @ query_embeddings.T).max(axis=1)
+        approximate = np.concatenate([
+            self.block_similarity(start, start + self.block_size, query_embeddings).max(axis=1)
+            for start in range(0, len(self.products), self.block_size)
+        ])
+        k = min(top_k, len(exact))
+        exact_top = set(np.argpartition(-exact, k - 1)[:k]) if k else set()
+        approximate_top = set(np.argpartition(-approximate, k - 1)[:k]) if k else set()
+        report = {
+            'dtype': self.embedding_dtype,
+            'recall_at_k': len(exact_top & approximate_top) / k if k else 1.0,
+            'max_score_error': float(np.abs(exact - approximate).max()) if len(exact) else 0.0,
+            'index_bytes': int(self.product_embeddings.nbytes),
+            'float32_bytes': int(reference.nbytes),
+        }
+        print(f"DEBUG: Quantization check for '{query}': {report}")
+        return report
+
+    def search(self, query, top_k=10, exclude_mask=None):
+        # top_k=None returns every product above the threshold, in catalog order (no sort)
         print(f"DEBUG: Searching for query: '{query}'")
         query_terms = [term.strip() for term in query.split(',') if term.strip()]
-        query_embeddings = self.model.encode(query_terms)
-        similarities = cosine_similarity(query_embeddings, self.product_embeddings)
-        max_similarities = np.max(similarities, axis=0)
-        
-        combined_scores = []
-        for i, product in enumerate(self.products):
-            semantic_score = max_similarities[i]
-            fuzzy_score = max(fuzz.partial_ratio(query.lower(), product['name'].lower()) / 100,
-                              fuzz.partial_ratio(query.lower(), product.get('description', '').lower()) / 100)
-            combined_score = max(semantic_score, fuzzy_score)
-            combined_scores.append(combined_score)
-            print(f"DEBUG: Product '{product['name']}' - Semantic Score: {semantic_score:.4f}, Fuzzy Score: {fuzzy_score:.4f}, Combined Score: {combined_score:.4f}")
-
-        top_indices = np.argsort(combined_scores)[-top_k:][::-1]
+        query_embeddings = normalize_rows(self.encode_terms(query_terms)) if query_terms else None
+        fuzzy_score = self.fuzzy_search_scores(query)
+
+        candidate_indices = np.zeros(0, dtype=np.int64)
+        candidate_scores = np.zeros(0, dtype=np.float32)
+        # Score the catalog in blocks to bound the size of the similarity matrix
+        for start in range(0, len(self.products), self.block_size):
+            end = min(start + self.block_size, len(self.products))
+            if query_embeddings is not None:
+                semantic_score = self.block_similarity(start, end, query_embeddings).max(axis=1)
+            else:
+                semantic_score = np.zeros(end - start, dtype=np.float32)
+            combined_scores = np.maximum(semantic_score, fuzzy_score[start:end])
+
+            # Excluded products can never be returned, so they do not take up top_k slots
+            if exclude_mask is not None:
+                combined_scores[exclude_mask[start:end]] = -np.inf
+
+            keep = np.flatnonzero(combined_scores >= self.similarity_threshold)
+            candidate_indices = np.concatenate([candidate_indices, keep + start])
+            candidate_scores = np.concatenate([candidate_scores, combined_scores[keep]])
+            if top_k is not None and len(candidate_indices) > top_k:
+                best = np.argpartition(-candidate_scores, top_k - 1)[:top_k]
+                candidate_indices = candidate_indices[best]
+                candidate_scores = candidate_scores[best]
+
+        # Only the surviving top_k candidates are sorted
+        order = np.argsort(-candidate_scores, kind='stable') if top_k is not None else np.arange(len(candidate_indices))
         results = [
-            {**self.products[i], 'similarity': float(combined_scores[i])}
-            for i in top_indices if combined_scores[i] >= self.similarity_threshold
+            {**self.products[i], 'similarity': float(score)}
+            for i, score in zip(candidate_indices[order], candidate_scores[order])
         ]
-        
+
         print(f"DEBUG: Found {len(results)} results above threshold {self.similarity_threshold}")
         for result in results:
             print(f"DEBUG: Included result: '{result['name']}' with similarity {result['similarity']:.4f}")
         
         return results
 
-    def check_exclude_similarity(self, product_text, exclude_words):
-        if not exclude_words:
-            return False
-        exclude_terms = [term.strip().lower() for term in exclude_words if term.strip()]
-        product_text_lower = product_text.lower()
-        product_embedding = self.model.encode([product_text_lower])
-        exclude_embeddings = self.model.encode(exclude_terms)
-        similarities = cosine_similarity(product_embedding, exclude_embeddings)[0]
-        fuzzy_scores = [fuzz.partial_ratio(term, product_text_lower) / 100 for term in exclude_terms]
-        should_exclude = any(sim > self.similarity_threshold for sim in similarities) or any(score > 0.8 for score in fuzzy_scores)
-        print(f"DEBUG: Checking exclusion for '{product_text}' against {exclude_terms}. Should exclude: {should_exclude}")
-        return should_exclude
+    def encode_terms(self, terms):
+        embeddings = self.term_cache.encode(terms, self.model)
+        print(f"DEBUG: Term embedding cache - {self.term_cache.hits} hits, {self.term_cache.misses} misses")
+        return embeddings
+
+    def fuzzy_search_scores(self, query):
+        query = query.lower()
+        return np.maximum(fuzzy_scores(query, self.product_names, self.fuzzy_workers),
+                          fuzzy_scores(query, self.product_descriptions, self.fuzzy_workers))
+
+    def exclude_mask(self, exclude_words):
+        # Boolean mask over the indexed products, reusing their embeddings instead of re-encoding each row
+        mask = np.zeros(len(self.products), dtype=bool)
+        exclude_terms = [term.strip().lower() for term in exclude_words if term.strip()] if exclude_words else []
+        if not exclude_terms or not len(mask):
+            return mask
+
+        exclude_embeddings = normalize_rows(self.encode_terms(exclude_terms))
+        for start in range(0, len(mask), self.block_size):
+            similarities = self.block_similarity(start, start + self.block_size, exclude_embeddings)
+            mask[start:start + self.block_size] |= np.any(similarities > self.similarity_threshold, axis=1)
+
+        for term in exclude_terms:
+            mask |= fuzzy_scores(term, self.product_texts, self.fuzzy_workers) > 0.8
 
+        print(f"DEBUG: Exclusion mask for {exclude_terms} excludes {int(mask.sum())} of {len(mask)} products")
+        return mask
 
 
 def preprocess_query(query):
@@ -0,0 +1,76 @@
+import csv
+import json
+import os
+from .common import FIELDNAMES, read_products_csv
+
+# Streams scraped pages to a CSV as they arrive and records which pages are on disk and which
+# failed, so an interrupted or partly failed scrape of the same URL only fetches what is missing.
+class CheckpointedWriter:
+    def __init__(self, file_path, url):
+        self.file_path = file_path
+        self.checkpoint_path = f"{file_path}.checkpoint.json"
+        self.url = url
+        self.done_pages = set()
+        self.failed_pages = set()
+
+    def start(self, resume=True):
+        # Returns the pages already on disk (empty for a fresh scrape)
+        checkpoint = self.load_checkpoint() if resume else None
+        if checkpoint and checkpoint.get('url') == self.url and os.path.exists(self.file_path):
+            # Checkpoints from before failed pages were tracked only record a contiguous prefix
+            self.done_pages = set(checkpoint.get('pages', range(1, checkpoint.get('last_page', 0) + 1)))
+            self.failed_pages = set(checkpoint.get('failed_pages', []))
+            # Drop rows written after the last checkpoint (a page cut off by a crash)
+            with open(self.file_path, 'r+b') as output_file:
+                output_file.truncate(checkpoint['size'])
+            print(f"Resuming scrape of {self.url}: {len(self.done_pages)} pages on disk, retrying failed pages {sorted(self.failed_pages)}")
+        else:
+            self.done_pages = set()
+            self.failed_pages = set()
+            with open(self.file_path, 'w', newline='', encoding='utf-8') as output_file:
+                csv.DictWriter(output_file, fieldnames=FIELDNAMES).writeheader()
+            self.save_checkpoint()
+        return set(self.done_pages)
+
+    def write_page(self, page, products):
+        # Every successful page is appended as soon as it arrives, so nothing waits behind a failed one.
+        # A failed page (None) is recorded, and a resumed scrape fetches it again.
+        if page in self.done_pages:
+            return
+        if products is None:
+            self.failed_pages.add(page)
+        else:
+            with open(self.file_path, 'a', newline='', encoding='utf-8') as output_file:
+                csv.DictWriter(output_file, fieldnames=FIELDNAMES, extrasaction='ignore').writerows(products)
+            self.done_pages.add(page)
+            self.failed_pages.discard(page)
+        self.save_checkpoint()
+
+    def finish(self):
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        print(f"File saved successfully at {os.path.abspath(self.file_path)}")
+
+    def read_products(self):
+        return read_products_csv(self.file_path)
+
+    def load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error reading checkpoint: {e}")
+            return None
+
+    def save_checkpoint(self):
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'url': self.url,
+                'pages': sorted(self.done_pages),
+                'failed_pages': sorted(self.failed_pages),
+                'size': os.path.getsize(self.file_path),
+            }, f)
+        os.replace(tmp_path, self.checkpoint_path)
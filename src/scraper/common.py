@@ -0,0 +1,140 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import csv
+import os
+
+BASE_URL = 'https://www.supermarket23.com/en'
+IMAGE_URL = 'https://medias.treew.com/imgproducts/middle/{}.jpg'
+RESULTS_PER_PAGE = 20
+FIELDNAMES = ['name', 'price', 'old_price', 'price_by_weight', 'link', 'image_url']
+
+def search_url(search_term, base_url=BASE_URL):
+    return f'{base_url}/buscar?q={search_term}'
+
+def catalog_url(base_url=BASE_URL):
+    return f'{base_url}/productos'
+
+def page_url(url, page):
+    if page == 1:
+        return url
+    separator = '&' if '?' in url else '?'
+    return f"{url}{separator}pagina={page}"
+
+def total_pages_from_text(total_results_text):
+    # "Showing 1 - 20 of 371 results"
+    total_results = int(total_results_text.split()[-2])
+    # Ceiling division; a total that is a multiple of 20 has no extra, empty page
+    return max(1, -(-total_results // RESULTS_PER_PAGE))
+
+def build_product(name, price, old_price, price_by_weight, link):
+    # Shared by every scraper backend so they all produce the same product dicts
+    name = name.strip() if name else "No name found"
+    price = price.strip() if price else "No price found"
+    old_price = old_price.strip() if old_price else "No old price found"
+    price_by_weight = price_by_weight.strip() if price_by_weight else "No price by weight found"
+
+    product_number = link.split('/')[-1]
+    image_url = IMAGE_URL.format(product_number)
+    print(f"Product: {name}, Image URL: {image_url}")  # Debug message
+
+    return {
+        'name': name,
+        'price': float(price.replace('$', '').replace(',', '')),
+        'old_price': float(old_price.replace('$', '').replace(',', '')) if old_price != "No old price found" else None,
+        'price_by_weight': price_by_weight,
+        'link': link,
+        'image_url': image_url
+    }
+
+async def run_pages(url, progress_callback, scrape_first_page, scrape_page, workers, stop_when=None, stop_after=1, on_page=None, done_pages=()):
+    # scrape_first_page(url) -> (products, total_pages); scrape_page(url) -> products, or None if the page failed.
+    # Pages after the first run on a thread pool and are merged back in page order.
+    # With stop_when, pages are fetched in windows of `workers` and paging stops once
+    # stop_when(products) holds for stop_after consecutive pages.
+    # With on_page, each page is handed to on_page(page, products) as soon as it is parsed and
+    # not kept in memory (None for a failed page); the return value is then the number of products scraped.
+    # Pages in done_pages are skipped (page 1 is still loaded for the page count).
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=workers)
+    pages = {}
+    product_count = 0
+    remaining = []
+
+    def collect(page, products):
+        nonlocal product_count
+        product_count += len(products or [])
+        if on_page is None:
+            pages[page] = products or []
+        else:
+            on_page(page, products)
+
+    async def run_page(page):
+        return page, await loop.run_in_executor(executor, scrape_page, page_url(url, page))
+
+    try:
+        first_products, total_pages = await loop.run_in_executor(executor, scrape_first_page, url)
+        if 1 not in done_pages:
+            collect(1, first_products)
+        progress_total_steps = total_pages * RESULTS_PER_PAGE
+        todo = [page for page in range(2, total_pages + 1) if page not in done_pages]
+        skipped = total_pages - len(todo)
+        await progress_callback(skipped * RESULTS_PER_PAGE, progress_total_steps)
+
+        if stop_when is None:
+            # Tasks are created in page order so the executor picks pages up in order
+            remaining = [asyncio.ensure_future(run_page(page)) for page in todo]
+            for pages_done, next_page in enumerate(asyncio.as_completed(remaining), start=skipped + 1):
+                page, products = await next_page
+                collect(page, products)
+                await progress_callback(pages_done * RESULTS_PER_PAGE, progress_total_steps)
+        else:
+            unchanged_pages = 1 if stop_when(first_products) else 0
+            fetched = 0
+            while fetched < len(todo) and unchanged_pages < stop_after:
+                window = todo[fetched:fetched + workers]
+                for page, products in await asyncio.gather(*[run_page(page) for page in window]):
+                    collect(page, products)
+                    if unchanged_pages < stop_after:
+                        # A failed page never counts as unchanged
+                        unchanged_pages = unchanged_pages + 1 if products is not None and stop_when(products) else 0
+                fetched += len(window)
+                await progress_callback((skipped + fetched) * RESULTS_PER_PAGE, progress_total_steps)
+            if fetched < len(todo):
+                print(f"Stopped after page {todo[fetched - 1]} of {total_pages}: {stop_after} consecutive pages had nothing new")
+                await progress_callback(progress_total_steps, progress_total_steps)
+    finally:
+        for task in remaining:
+            task.cancel()
+        # Wait for worker threads without blocking the event loop
+        await loop.run_in_executor(None, executor.shutdown)
+
+    if on_page is not None:
+        return product_count
+    return [product for page in sorted(pages) for product in pages[page]]
+
+def parse_price(value):
+    if value in (None, ''):
+        return None
+    return float(value)
+
+def read_products_csv(file_path):
+    products = []
+    with open(file_path, newline='', encoding='utf-8') as input_file:
+        for row in csv.DictReader(input_file):
+            row['price'] = parse_price(row.get('price'))
+            row['old_price'] = parse_price(row.get('old_price'))
+            products.append(row)
+    return products
+
+def save_products_csv(products, file_path):
+    if not products:
+        print(f"No products to save to {file_path}")
+        return
+    try:
+        with open(file_path, 'w', newline='', encoding='utf-8') as output_file:
+            dict_writer = csv.DictWriter(output_file, fieldnames=FIELDNAMES, extrasaction='ignore')
+            dict_writer.writeheader()
+            dict_writer.writerows(products)
+        print(f"File saved successfully at {os.path.abspath(file_path)}")
+    except Exception as e:
+        print(f"Error saving file: {e}")
@@ -0,0 +1,139 @@
+import asyncio
+import atexit
+import threading
+from .common import catalog_url, search_url
+
+SCRAPER_BACKENDS = ['http', 'selenium']
+DEFAULT_BACKEND = 'http'
+FALLBACK_BACKEND = 'selenium'
+DEFAULT_IDLE_TIMEOUT = 300  # Seconds a warm driver pool / HTTP session is kept open between runs
+
+def target_url(target):
+    # A search term targets its search results; None targets the full catalog
+    return catalog_url() if target is None else search_url(target)
+
+# Backends are imported on first use so Selenium, requests and lxml stay out of startup
+def backend_module(backend):
+    if backend == 'selenium':
+        from . import selenium_scraper
+        return selenium_scraper
+    from . import http_scraper
+    return http_scraper
+
+# Single entry point for every scrape. The chromedriver binary is resolved once per engine,
+# and the headless driver pool and HTTP session stay warm between runs until they have
+# been idle for idle_timeout seconds.
+class ScraperEngine:
+    def __init__(self, workers=None, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.workers = workers
+        self.idle_timeout = idle_timeout
+        self.driver_path = None
+        self.driver_pool = None
+        self.session = None
+        self.active_runs = 0
+        self.idle_timer = None
+        self.lock = threading.Lock()
+        atexit.register(self.close)
+
+    def resolve_driver_path(self):
+        with self.lock:
+            if self.driver_path is None:
+                self.driver_path = backend_module('selenium').resolve_driver_path()
+                print(f"Resolved chromedriver at {self.driver_path}")
+            return self.driver_path
+
+    def create_driver(self):
+        return backend_module('selenium').create_driver(self.resolve_driver_path())
+
+    def begin_run(self):
+        with self.lock:
+            self.active_runs += 1
+            if self.idle_timer is not None:
+                self.idle_timer.cancel()
+                self.idle_timer = None
+
+    def end_run(self):
+        with self.lock:
+            self.active_runs -= 1
+            if self.active_runs == 0 and self.idle_timeout is not None:
+                self.idle_timer = threading.Timer(self.idle_timeout, self.close_if_idle)
+                self.idle_timer.daemon = True
+                self.idle_timer.start()
+
+    def get_driver_pool(self):
+        with self.lock:
+            if self.driver_pool is None:
+                selenium_scraper = backend_module('selenium')
+                self.driver_pool = selenium_scraper.DriverPool(self.workers or selenium_scraper.DEFAULT_WORKERS, self.create_driver)
+            return self.driver_pool
+
+    def get_session(self):
+        with self.lock:
+            if self.session is None:
+                http_scraper = backend_module('http')
+                self.session = http_scraper.create_session(self.workers or http_scraper.DEFAULT_WORKERS)
+            return self.session
+
+    async def scrape_with(self, backend, url, progress_callback, **page_options):
+        if backend == 'selenium':
+            pool = self.get_driver_pool()
+            return await backend_module('selenium').scrape_pages(url, progress_callback, pool=pool, **page_options)
+        session = self.get_session()
+        http_scraper = backend_module('http')
+        return await http_scraper.scrape_pages(url, progress_callback, self.workers or http_scraper.DEFAULT_WORKERS, session=session, **page_options)
+
+    async def scrape(self, target, progress_callback, backend=DEFAULT_BACKEND, fallback=True, **page_options):
+        # Scrape a search term (or the full catalog for None); a failed or empty browserless run
+        # falls back to Selenium unless fallback is False, for callers whose page_options carry
+        # state (an on_page writer) that has to be reset first. page_options are passed through
+        # to common.run_pages.
+        url = target_url(target)
+        self.begin_run()
+        try:
+            if not fallback:
+                return await self.scrape_with(backend, url, progress_callback, **page_options)
+            if backend != FALLBACK_BACKEND:
+                try:
+                    products = await self.scrape_with(backend, url, progress_callback, **page_options)
+                    if products:
+                        return products
+                    print(f"Backend '{backend}' found no products, falling back to {FALLBACK_BACKEND}")
+                except Exception as e:
+                    print(f"Backend '{backend}' failed ({e}), falling back to {FALLBACK_BACKEND}")
+            return await self.scrape_with(FALLBACK_BACKEND, url, progress_callback, **page_options)
+        finally:
+            self.end_run()
+
+    def detach(self):
+        # Caller holds the lock; hands back the warm pool and session for closing outside it
+        if self.idle_timer is not None:
+            self.idle_timer.cancel()
+            self.idle_timer = None
+        driver_pool, self.driver_pool = self.driver_pool, None
+        session, self.session = self.session, None
+        return driver_pool, session
+
+    def close_if_idle(self):
+        # The idle check and the detach happen in one critical section, so a run that starts
+        # right after never gets its pool torn down
+        with self.lock:
+            if self.active_runs:
+                return
+            driver_pool, session = self.detach()
+        print("Scraper engine idle, closing warm sessions")
+        self.close_detached(driver_pool, session)
+
+    def close(self):
+        # Quitting Chrome blocks, so async callers should run this in an executor
+        with self.lock:
+            driver_pool, session = self.detach()
+        self.close_detached(driver_pool, session)
+
+    def close_detached(self, driver_pool, session):
+        if driver_pool is not None:
+            driver_pool.close()
+        if session is not None:
+            session.close()
+
+    async def close_async(self):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
@@ -0,0 +1,86 @@
+from functools import partial
+from urllib.parse import urljoin
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from lxml import html
+from .common import build_product, run_pages, total_pages_from_text
+
+DEFAULT_WORKERS = 8
+REQUEST_TIMEOUT = 15
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Safari/537.36'
+
+def has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+PRODUCT_XPATH = f"//*[{has_class('single_product')}]"
+NAME_XPATH = ".//h3/a"
+PRICE_XPATHS = [f".//span[{has_class('current_price')}]", f".//span[{has_class('regular_price')}]"]
+OLD_PRICE_XPATH = f".//span[{has_class('old_price')}]"
+PRICE_BY_WEIGHT_XPATH = f".//span[{has_class('price-by-weight')}]"
+LINK_XPATH = f".//div[{has_class('product_thumb')}]/a/@href"
+TOTAL_RESULTS_XPATH = '//p[contains(text(),"Showing")]'
+
+def create_session(pool_size=DEFAULT_WORKERS):
+    # One keep-alive connection per worker, with retries for flaky pages
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504]),
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'User-Agent': USER_AGENT})
+    return session
+
+def first_text(element, xpaths):
+    for xpath in xpaths:
+        found = element.xpath(xpath)
+        if found:
+            return found[0].text_content()
+    return None
+
+def parse_products(document, url):
+    products = []
+    for product in document.xpath(PRODUCT_XPATH):
+        try:
+            link = product.xpath(LINK_XPATH)[0]
+            products.append(build_product(
+                first_text(product, [NAME_XPATH]),
+                first_text(product, PRICE_XPATHS),
+                first_text(product, [OLD_PRICE_XPATH]),
+                first_text(product, [PRICE_BY_WEIGHT_XPATH]),
+                urljoin(url, link),
+            ))
+        except Exception as e:
+            print(f"Error processing product: {e}")
+    return products
+
+def fetch_page(session, url):
+    response = session.get(url, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return html.fromstring(response.content)
+
+def scrape_first_page(session, url):
+    document = fetch_page(session, url)
+    total_results_element = document.xpath(TOTAL_RESULTS_XPATH)
+    if not total_results_element:
+        raise ValueError(f"No result count found on {url}")
+    return parse_products(document, url), total_pages_from_text(total_results_element[0].text_content())
+
+def scrape_page(session, url):
+    try:
+        return parse_products(fetch_page(session, url), url)
+    except Exception as e:
+        print(f"Error scraping page {url}: {e}")
+        return None
+
+async def scrape_pages(url, progress_callback, workers=DEFAULT_WORKERS, session=None, **page_options):
+    owns_session = session is None
+    session = session or create_session(workers)
+    try:
+        return await run_pages(url, progress_callback, partial(scrape_first_page, session), partial(scrape_page, session), workers, **page_options)
+    finally:
+        if owns_session:
+            session.close()
@@ -0,0 +1,45 @@
+import os
+import re
+from .common import read_products_csv
+
+DEFAULT_STOP_AFTER = 3  # Consecutive pages with nothing new before a delta crawl stops paging
+PRICE_FIELDS = ['price', 'old_price', 'price_by_weight']
+
+def product_id(link):
+    # Numeric tail of the product link, e.g. https://.../producto/182386 -> '182386'
+    match = re.search(r'(\d+)/?$', link or '')
+    return match.group(1) if match else link
+
+def load_snapshot(file_path):
+    # Previous scrape as an ordered {product_id: product} map; empty if there is none yet
+    if not os.path.exists(file_path):
+        return {}
+    snapshot = {product_id(row.get('link')): row for row in read_products_csv(file_path)}
+    print(f"Loaded {len(snapshot)} products from snapshot {file_path}")
+    return snapshot
+
+def is_unchanged(snapshot, product):
+    known = snapshot.get(product_id(product['link']))
+    return known is not None and all(known.get(field) == product.get(field) for field in PRICE_FIELDS)
+
+def page_has_nothing_new(snapshot, products):
+    # A page that failed to load (no products) does not count as unchanged
+    return bool(products) and all(is_unchanged(snapshot, product) for product in products)
+
+def merge_into_snapshot(snapshot, products):
+    # New products go first, known products only get their price fields updated
+    merged = dict(snapshot)
+    new_products = []
+    updated = 0
+    for product in products:
+        key = product_id(product['link'])
+        known = merged.get(key)
+        if known is None:
+            new_products.append(product)
+            continue
+        changes = {field: product.get(field) for field in PRICE_FIELDS if known.get(field) != product.get(field)}
+        if changes:
+            merged[key] = {**known, **changes}
+            updated += 1
+    print(f"Incremental scrape: {len(new_products)} new products, {updated} price updates")
+    return new_products + list(merged.values())
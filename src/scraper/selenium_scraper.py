@@ -0,0 +1,131 @@
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+from webdriver_manager.chrome import ChromeDriverManager
+from functools import partial
+import asyncio
+import queue
+import threading
+from .common import build_product, run_pages, total_pages_from_text
+
+DEFAULT_WORKERS = 4
+
+def resolve_driver_path():
+    # Resolves (and may download) a matching chromedriver; callers should do this once and reuse the path
+    return ChromeDriverManager().install()
+
+def create_driver(driver_path=None):
+    service = Service(driver_path or resolve_driver_path())
+    options = webdriver.ChromeOptions()
+    options.add_argument('--headless')
+    return webdriver.Chrome(service=service, options=options)
+
+# Fixed-size pool of headless drivers; drivers are started lazily and reused across pages
+class DriverPool:
+    def __init__(self, size=DEFAULT_WORKERS, driver_factory=create_driver):
+        self.size = size
+        self.driver_factory = driver_factory
+        self.drivers = []
+        self.idle = queue.Queue()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            if len(self.drivers) < self.size:
+                driver = self.driver_factory()
+                self.drivers.append(driver)
+                return driver
+        return self.idle.get()
+
+    def release(self, driver):
+        self.idle.put(driver)
+
+    def close(self):
+        for driver in self.drivers:
+            try:
+                driver.quit()
+            except Exception as e:
+                print(f"Error closing driver: {e}")
+        self.drivers = []
+
+def wait_for_products(driver):
+    # A loaded page without product cards times out here; it is read as an empty page, not a failure
+    try:
+        WebDriverWait(driver, 10).until(EC.presence_of_all_elements_located((By.CLASS_NAME, 'single_product')))
+    except TimeoutException:
+        print(f"No product cards found on {driver.current_url}")
+
+# Collects every product card on the page in the browser and returns them in one WebDriver round trip
+EXTRACT_PAGE_SCRIPT = """
+const text = (root, selector) => {
+    const element = root.querySelector(selector);
+    return element ? element.innerText : null;
+};
+const showing = Array.from(document.querySelectorAll('p')).find(p => p.textContent.includes('Showing'));
+return {
+    total_results_text: showing ? showing.innerText : null,
+    products: Array.from(document.getElementsByClassName('single_product')).map(card => {
+        const link = card.querySelector('div.product_thumb > a');
+        return {
+            name: text(card, 'h3 > a'),
+            price: text(card, 'span.current_price') ?? text(card, 'span.regular_price'),
+            old_price: text(card, 'span.old_price'),
+            price_by_weight: text(card, 'span.price-by-weight'),
+            link: link ? link.href : null,
+        };
+    }),
+};
+"""
+
+def extract_page(driver):
+    page = driver.execute_script(EXTRACT_PAGE_SCRIPT)
+    products = []
+    for fields in page['products']:
+        try:
+            products.append(build_product(fields['name'], fields['price'], fields['old_price'], fields['price_by_weight'], fields['link']))
+        except Exception as e:
+            print(f"Error processing product: {e}")
+    return products, page['total_results_text']
+
+def scrape_first_page(pool, url):
+    driver = pool.acquire()
+    try:
+        driver.get(url)
+        wait_for_products(driver)
+        products, total_results_text = extract_page(driver)
+        if total_results_text is None:
+            raise ValueError(f"No result count found on {url}")
+        return products, total_pages_from_text(total_results_text)
+    finally:
+        pool.release(driver)
+
+def scrape_page(pool, url):
+    driver = pool.acquire()
+    try:
+        driver.get(url)
+        wait_for_products(driver)
+        products, _ = extract_page(driver)
+        return products
+    except Exception as e:
+        print(f"Error scraping page {url}: {e}")
+        return None
+    finally:
+        pool.release(driver)
+
+async def scrape_pages(url, progress_callback, workers=DEFAULT_WORKERS, driver_factory=create_driver, pool=None, **page_options):
+    # A pool passed in is left running for reuse; otherwise a temporary one is closed afterwards
+    owns_pool = pool is None
+    pool = pool or DriverPool(workers, driver_factory)
+    try:
+        return await run_pages(url, progress_callback, partial(scrape_first_page, pool), partial(scrape_page, pool), pool.size, **page_options)
+    finally:
+        if owns_pool:
+            # Quitting Chrome blocks on the driver, so keep it off the event loop
+            await asyncio.get_running_loop().run_in_executor(None, pool.close)
@@ -1,13 +1,27 @@
 import flet as ft
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from src.ui.results_view import ResultsView
-from src.ui.search_view import SearchView
-from src.optimizer.optimization_script import optimize_purchase_greedy, optimize_purchase_knapsack, optimize_purchase_ratio
+from src.ui.search_view import CATALOG_FILE, PROGRESS_INTERVAL, SearchView
+from src.catalog.store import CatalogStore
+from src.scraper.incremental import product_id
+
+# Best search matches passed to the optimizer. None (every product above the similarity threshold) is an
+# explicit opt-in: fuzzy partial_ratio scores clear the threshold for most of the catalog on short queries.
+SEARCH_TOP_K = 10
 
 class MainView(ft.UserControl):
     def __init__(self, page):
         super().__init__()
         self.page = page
-        self.search_view = SearchView(self.handle_search)
+        self.catalog_store = CatalogStore()
+        self.product_scope = None  # Product IDs of the last scrape; None means the whole catalog
+        self.snapshot = None
+        self.snapshot_embeddings = None
+        self.search_view = SearchView(self.handle_search, catalog_store=self.catalog_store, release_snapshot=self.release_snapshot)
         self.results_view = ResultsView()
         
         # Define a consistent height for all input fields and buttons
@@ -53,7 +67,22 @@ class MainView(ft.UserControl):
             ),
             height=self.input_height,
         )
+        self.cancel_button = ft.OutlinedButton(
+            "Cancel",
+            on_click=self.handle_cancel_optimize,
+            icon=ft.icons.CANCEL,
+            visible=False,
+            style=ft.ButtonStyle(
+                shape=ft.RoundedRectangleBorder(radius=8),
+            ),
+            height=self.input_height,
+        )
         self.optimize_progress = ft.ProgressRing(visible=False, width=24, height=24)
+        self.optimize_status = ft.Text("", visible=False)
+        # Optimization runs on a single worker thread so the event loop stays free; jobs run one at a time
+        self.optimize_executor = ThreadPoolExecutor(max_workers=1)
+        self.cancel_event = None
+        self.progress_interval = PROGRESS_INTERVAL
 
     def build(self):
         return ft.Container(
@@ -94,11 +123,14 @@ class MainView(ft.UserControl):
                                             ft.Container(width=10),
                                             self.optimize_button,
                                             ft.Container(width=10),
+                                            self.cancel_button,
+                                            ft.Container(width=10),
                                             self.optimize_progress
                                         ],
                                         alignment=ft.MainAxisAlignment.SPACE_BETWEEN
                                     ),
                                     ft.Container(height=10),  # Add vertical spacing
+                                    self.optimize_status,
                                     self.similarity_threshold,
                                     self.threshold_label,
                                 ]),
@@ -124,38 +156,143 @@ class MainView(ft.UserControl):
         self.threshold_label.value = f"Similarity Threshold: {self.similarity_threshold.value:.2f}"
         self.update()
 
+    def load_catalog(self):
+        # Runs in the background after the window is up; a scrape that finished first takes precedence.
+        # The memory-mapped columnar snapshot is the fast path for the full catalog, but only while it is
+        # at least as fresh as the store (search-term scrapes update the store, not all_products.arrow).
+        from src.catalog.snapshot import load_snapshot, snapshot_path
+        path = snapshot_path(CATALOG_FILE)
+        snapshot_time = os.path.getmtime(path) if os.path.exists(path) else None
+        store_time = self.catalog_store.last_updated()
+        snapshot, snapshot_embeddings, stored_products = None, None, None
+        if snapshot_time is not None and (store_time is None or snapshot_time >= store_time):
+            snapshot, snapshot_embeddings = load_snapshot(path)
+        if snapshot is None:
+            stored_products = self.catalog_store.load_products()
+        if hasattr(self, 'products'):
+            return
+        if snapshot is not None:
+            self.snapshot, self.snapshot_embeddings = snapshot, snapshot_embeddings
+            self.products = snapshot
+        elif stored_products:
+            self.products = stored_products
+
+    def release_snapshot(self):
+        # Drop every reference into the memory-mapped snapshot so the file can be replaced (required on Windows)
+        if self.snapshot is not None and getattr(self, 'products', None) is self.snapshot:
+            del self.products
+        self.snapshot = None
+        self.snapshot_embeddings = None
+
     async def handle_search(self, products):
         self.products = products
+        self.release_snapshot()
+        self.product_scope = [product_id(product['link']) for product in products]
         self.update()
 
-    async def handle_optimize(self, e):
-        if self.budget.value and self.search_query.value and hasattr(self, 'products'):
-            try:
-                self.optimize_progress.visible = True
-                self.update()
+    def budget_candidates(self, budget):
+        # Only affordable products reach the optimizer, filtered on the snapshot columns or as an indexed query
+        if self.snapshot is not None:
+            affordable = (self.snapshot['effective_price'] <= budget).to_numpy()
+            embeddings = self.snapshot_embeddings[affordable] if self.snapshot_embeddings is not None else None
+            return self.snapshot[affordable].reset_index(drop=True), embeddings
+        # Ordered by lb_per_dollar in the query; with SEARCH_TOP_K = None search keeps that order for the greedy pass
+        return self.catalog_store.load_products(max_price=budget, product_ids=self.product_scope, order_by_lb_per_dollar=True), None
 
-                budget = float(self.budget.value)
-                exclude_words = [word.strip().lower() for word in self.exclude_term.value.split(',')] if self.exclude_term.value else []
-                search_query = self.search_query.value
-                similarity_threshold = self.similarity_threshold.value
+    def run_optimization(self, budget, exclude_words, search_query, similarity_threshold, cancel_event, on_progress):
+        # Runs on the optimize worker thread; returns None when the job was cancelled
+        from src.optimizer.optimization_script import OPTIMIZE_STAGES, OptimizationCancelled, optimize_all
+        last_update = 0
 
-                greedy_results = optimize_purchase_greedy(self.products, budget, exclude_words, search_query, similarity_threshold)
-                knapsack_results = optimize_purchase_knapsack(self.products, budget, exclude_words, search_query, similarity_threshold)
-                ratio_results = optimize_purchase_ratio(self.products, budget, exclude_words, search_query, similarity_threshold)
+        def progress_callback(stage, done, total):
+            nonlocal last_update
+            if cancel_event.is_set():
+                raise OptimizationCancelled()
+            now = time.monotonic()
+            if done and now - last_update < self.progress_interval:
+                return
+            last_update = now
+            on_progress(stage, (OPTIMIZE_STAGES.index(stage) + done / max(total, 1)) / len(OPTIMIZE_STAGES))
 
-                print("Greedy Results:", greedy_results)  # Debugging line
-                print("Knapsack Results:", knapsack_results)  # Debugging line
-                print("Ratio Results:", ratio_results)  # Debugging line
+        try:
+            candidates, embeddings = self.budget_candidates(budget)
+            return optimize_all(candidates, budget, exclude_words, search_query, similarity_threshold,
+                                knapsack_mode='unbounded', embeddings=embeddings, progress_callback=progress_callback,
+                                top_k=SEARCH_TOP_K)
+        except OptimizationCancelled:
+            print("DEBUG: Optimization cancelled")
+            return None
 
-                self.results_view.update_results(greedy_results, knapsack_results, ratio_results)
+    def show_optimize_progress(self, stage, fraction):
+        self.optimize_progress.value = fraction
+        self.optimize_status.value = f"Optimizing: {stage} ({fraction:.0%})"
+        self.update()
 
-                self.optimize_progress.visible = False
-                self.update()
+    def set_optimizing(self, running):
+        self.optimize_button.disabled = running
+        self.cancel_button.visible = running
+        self.cancel_button.disabled = False
+        self.optimize_progress.visible = running
+        self.optimize_progress.value = 0 if running else None
+        self.optimize_status.visible = running
+        self.optimize_status.value = "Optimizing: starting" if running else ""
+        self.update()
+
+    async def handle_cancel_optimize(self, e):
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.cancel_button.disabled = True
+            self.optimize_status.value = "Cancelling..."
+            self.update()
+
+    async def handle_optimize(self, e):
+        if self.budget.value and self.search_query.value and hasattr(self, 'products'):
+            try:
+                budget = float(self.budget.value)
             except ValueError:
                 self.page.snack_bar = ft.SnackBar(content=ft.Text("Invalid budget value"))
                 self.page.snack_bar.open = True
-                self.optimize_progress.visible = False
                 self.update()
+                return
+            exclude_words = [word.strip().lower() for word in self.exclude_term.value.split(',')] if self.exclude_term.value else []
+            search_query = self.search_query.value
+            similarity_threshold = self.similarity_threshold.value
+
+            loop = asyncio.get_running_loop()
+            self.cancel_event = threading.Event()
+            self.set_optimizing(True)
+            failed = False
+            try:
+                # Progress arrives on the worker thread and is handed back to the event loop
+                on_progress = lambda stage, fraction: loop.call_soon_threadsafe(self.show_optimize_progress, stage, fraction)
+                results = await loop.run_in_executor(
+                    self.optimize_executor, self.run_optimization,
+                    budget, exclude_words, search_query, similarity_threshold, self.cancel_event, on_progress,
+                )
+            except Exception as ex:
+                print(f"Error during optimization: {ex}")
+                self.page.snack_bar = ft.SnackBar(content=ft.Text(f"Optimization failed: {ex}"))
+                self.page.snack_bar.open = True
+                failed = True
+                results = None
+            finally:
+                self.cancel_event = None
+                self.set_optimizing(False)
+
+            if results is None:
+                if not failed:
+                    self.page.snack_bar = ft.SnackBar(content=ft.Text("Optimization cancelled"))
+                    self.page.snack_bar.open = True
+                    self.update()
+                return
+
+            greedy_results, knapsack_results, ratio_results = results
+            print("Greedy Results:", greedy_results)  # Debugging line
+            print("Knapsack Results:", knapsack_results)  # Debugging line
+            print("Ratio Results:", ratio_results)  # Debugging line
+
+            self.results_view.update_results(greedy_results, knapsack_results, ratio_results)
+            self.update()
         else:
             self.page.snack_bar = ft.SnackBar(content=ft.Text("Please fill in all fields and scrape products first"))
             self.page.snack_bar.open = True
@@ -1,5 +1,4 @@
 import flet as ft
-from collections import Counter
 
 class ResultsView(ft.UserControl):
     def __init__(self):
@@ -62,7 +61,7 @@ class ResultsView(ft.UserControl):
         self.update_optimization_results("Knapsack Optimization", knapsack_results)
         self.update_optimization_results("Ratio-based Optimization", ratio_results)
 
-        self.update_top_3(greedy_results[2])
+        self.update_top_3(greedy_results[3])
         self.highlight_best_performance()
 
         self.expansion_panel_list.controls = [
@@ -73,9 +72,9 @@ class ResultsView(ft.UserControl):
         self.update()
 
     def update_optimization_results(self, optimization_type, results):
-        selected_products, total_weight, _ = results
+        basket, total_price, total_weight, _ = results
         results_column = ft.Column(alignment=ft.alignment.center)
-        total_price = self.update_result_section(selected_products, total_weight, results_column)
+        self.update_result_section(basket, results_column)
         
         self.optimization_results[optimization_type].update({
             "results": results_column,
@@ -83,19 +82,12 @@ class ResultsView(ft.UserControl):
             "total_weight": total_weight
         })
 
-    def update_result_section(self, selected_products, total_weight, results_column):
-        if not selected_products:
+    def update_result_section(self, basket, results_column):
+        if not basket:
             results_column.controls.append(ft.Text("No products could be selected within the given budget.", weight=ft.FontWeight.BOLD, text_align=ft.TextAlign.LEFT))
-            return 0
-        
-        product_counter = Counter([product['name'] for product in selected_products])
-        unique_products = list({product['name']: product for product in selected_products}.values())
-        total_price = 0
-
-        for product in unique_products:
-            quantity = product_counter[product['name']]
-            total_price += product['effective_price'] * quantity
-            
+            return
+
+        for product, quantity in basket:
             quantity_container = ft.Container(
                 content=ft.Text(f"{quantity}X", weight=ft.FontWeight.BOLD, text_align=ft.TextAlign.CENTER, size=32),
                 width=60,
@@ -151,8 +143,6 @@ class ResultsView(ft.UserControl):
 
             results_column.controls.append(outer_container)
 
-        return total_price
-
     def update_top_3(self, top_3):
         self.top_3_results.controls.clear()
         for product in top_3:
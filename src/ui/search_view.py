@@ -1,18 +1,22 @@
 import flet as ft
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 import asyncio
-import csv
-import os
+import time
+from functools import partial
+from src.scraper.checkpoint import CheckpointedWriter
+from src.scraper.common import save_products_csv
+from src.scraper.engine import DEFAULT_BACKEND, FALLBACK_BACKEND, SCRAPER_BACKENDS, ScraperEngine, target_url
+from src.scraper.incremental import DEFAULT_STOP_AFTER, load_snapshot, merge_into_snapshot, page_has_nothing_new
+
+PROGRESS_INTERVAL = 1 / 15  # Coalesce progress repaints to at most 15 per second; shared with MainView
+CATALOG_FILE = 'all_products.csv'  # Full-catalog scan; its columnar snapshot is what MainView loads
 
 class SearchView(ft.UserControl):
-    def __init__(self, search_callback):
+    def __init__(self, search_callback, scrape_workers=None, catalog_store=None, release_snapshot=None):
         super().__init__()
         self.search_callback = search_callback
+        self.catalog_store = catalog_store
+        self.release_snapshot = release_snapshot  # Called before a snapshot file is replaced
+        self.engine = ScraperEngine(scrape_workers)  # Pages fetched in parallel; None uses the backend default
         self.input_height = 50  # Match the height used in MainView
         self.search_term = ft.TextField(
             label="Product Search Term",
@@ -35,10 +39,20 @@ class SearchView(ft.UserControl):
                 shape=ft.RoundedRectangleBorder(radius=8),
             ),
         )
+        self.backend = ft.Dropdown(
+            label="Backend",
+            width=130,
+            value=DEFAULT_BACKEND,
+            options=[ft.dropdown.Option(name) for name in SCRAPER_BACKENDS],
+        )
+        self.incremental = ft.Checkbox(label="Incremental", value=False, tooltip="Only update changes since the last full scan")
         self.progress_bar = ft.ProgressBar(visible=False, value=0)
         self.progress_text = ft.Text("", visible=False)
         self.checkmark = ft.Icon(name=ft.icons.CHECK_CIRCLE, color=ft.colors.GREEN, visible=False)
         self.working_text = ft.Text("", visible=False)
+        self.progress_interval = PROGRESS_INTERVAL
+        self.last_progress_update = 0
+        self.failed_pages = []  # Pages the last scrape could not fetch
 
     def build(self):
         return ft.Column([
@@ -47,7 +61,11 @@ class SearchView(ft.UserControl):
                 ft.Container(width=10),  # Add spacing between field and button
                 self.search_button,
                 ft.Container(width=10),  # Add spacing between buttons
-                self.scan_all_button
+                self.scan_all_button,
+                ft.Container(width=10),
+                self.incremental,
+                ft.Container(width=10),
+                self.backend
             ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
             self.working_text,
             self.progress_bar,
@@ -57,202 +75,122 @@ class SearchView(ft.UserControl):
 
     async def handle_search(self, e):
         if self.search_term.value:
-            self.progress_text.visible = True
-            self.progress_bar.visible = True            
-            self.checkmark.visible = False
-            self.working_text.value = "Working on it..."
-            self.working_text.visible = True
-            self.progress_bar.value = 0  # Reset progress bar
-            await self.update_async()
-            products = await self.scrape_products(self.search_term.value, self.update_progress)
-            await self.search_callback(products)  # Await the callback
-            self.progress_bar.visible = False
-            self.progress_text.visible = False
-            self.checkmark.visible = True
-            self.working_text.visible = False
-            await self.update_async()
+            await self.run_scrape(self.search_term.value, "Working on it...")
         else:
             print("Please enter a search term")
 
     async def handle_scan_all(self, e):
-        self.progress_text.visible = True
-        self.progress_bar.visible = True
-        self.checkmark.visible = False
-        self.working_text.value = "Scanning all products..."
-        self.working_text.visible = True
-        self.progress_bar.value = 0  # Reset progress bar
+        await self.run_scrape(None, "Scanning all products...")
+
+    async def run_scrape(self, target, working_message):
+        # target is a search term, or None for the full catalog. Both buttons stay disabled for the
+        # whole run, so a second click cannot restart the scrape and truncate the CSV being written.
+        self.set_scraping(True, working_message)
         await self.update_async()
-        products = await self.scrape_all_products(self.update_progress)
-        await self.search_callback(products)  # Await the callback
-        self.progress_bar.visible = False
-        self.progress_text.visible = False
-        self.checkmark.visible = True
-        self.working_text.visible = False
+        self.failed_pages = []
+        file_path = 'products.csv' if target is not None else CATALOG_FILE
+        error = None
+        try:
+            if target is None and self.incremental.value:
+                products = await self.scrape_incremental(file_path, self.update_progress)
+            else:
+                products = await self.scrape_to_file(target, file_path, self.update_progress)
+            await self.store_products(products, file_path)
+            await self.search_callback(products)  # Await the callback
+        except Exception as ex:
+            print(f"Error during scrape: {ex}")
+            error = f"Scrape failed: {ex}"
+        finally:
+            self.set_scraping(False)
+        if error is None and self.failed_pages:
+            error = f"{len(self.failed_pages)} pages failed to load; scrape again to fetch them"
+        self.checkmark.visible = error is None
+        self.working_text.value = error or ""
+        self.working_text.visible = error is not None
         await self.update_async()
 
+    def set_scraping(self, running, working_message=""):
+        self.search_button.disabled = running
+        self.scan_all_button.disabled = running
+        self.progress_bar.visible = running
+        self.progress_bar.value = 0
+        self.progress_text.visible = running
+        self.checkmark.visible = False
+        self.working_text.value = working_message
+        self.working_text.visible = running
+
     async def update_progress(self, current, total):
         self.progress_bar.value = current / total
         self.progress_text.value = f"Scraping progress: {current}/{total}"
+        now = time.monotonic()
+        if current < total and now - self.last_progress_update < self.progress_interval:
+            return
+        self.last_progress_update = now
         await self.update_async()
 
-    async def scrape_products(self, search_term, progress_callback):
-        service = Service(ChromeDriverManager().install())
-        options = webdriver.ChromeOptions()
-        options.add_argument('--headless')
-        driver = webdriver.Chrome(service=service, options=options)
-
-        url = f'https://www.supermarket23.com/en/buscar?q={search_term}'
-        driver.get(url)
-
-        WebDriverWait(driver, 10).until(EC.presence_of_all_elements_located((By.CLASS_NAME, 'single_product')))
-
-        total_results_element = driver.find_element(By.XPATH, '//p[contains(text(),"Showing")]')
-        total_results_text = total_results_element.text
-        total_results = int(total_results_text.split()[-2])
-        results_per_page = 20
-        total_pages = (total_results // results_per_page) + 1
-
-        products = []
-        progress_total_steps = total_pages * results_per_page
-        progress_current_step = 0
-
-        for page in range(1, total_pages + 1):
-            if page > 1:
-                page_url = f"{url}&pagina={page}"
-                driver.get(page_url)
-                WebDriverWait(driver, 10).until(EC.presence_of_all_elements_located((By.CLASS_NAME, 'single_product')))
-            
-            product_elements = driver.find_elements(By.CLASS_NAME, 'single_product')
-
-            for product in product_elements:
-                try:
-                    name_element = WebDriverWait(product, 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, 'h3 > a')))
-                    price_element = product.find_elements(By.CSS_SELECTOR, 'span.current_price')
-                    if not price_element:
-                        price_element = product.find_elements(By.CSS_SELECTOR, 'span.regular_price')
-                    old_price_element = product.find_elements(By.CSS_SELECTOR, 'span.old_price')
-                    price_by_weight_element = product.find_elements(By.CSS_SELECTOR, 'span.price-by-weight')
-                    
-                    name = name_element.get_attribute('innerText').strip() if name_element else "No name found"
-                    price = price_element[0].get_attribute('innerText').strip() if price_element else "No price found"
-                    old_price = old_price_element[0].get_attribute('innerText').strip() if old_price_element else "No old price found"
-                    price_by_weight = price_by_weight_element[0].get_attribute('innerText').strip() if price_by_weight_element else "No price by weight found"
-                    link = product.find_element(By.CSS_SELECTOR, 'div.product_thumb > a').get_attribute('href')
-                    
-                    product_number = link.split('/')[-1]
-                    image_url = f"https://medias.treew.com/imgproducts/middle/{product_number}.jpg"
-                    print(f"Product: {name}, Image URL: {image_url}")  # Debug message
-                    
-                    product_info = {
-                        'name': name,
-                        'price': float(price.replace('$', '').replace(',', '')),
-                        'old_price': float(old_price.replace('$', '').replace(',', '')) if old_price != "No old price found" else None,
-                        'price_by_weight': price_by_weight,
-                        'link': link,
-                        'image_url': image_url
-                    }
-                    products.append(product_info)
-                except Exception as e:
-                    print(f"Error processing product: {e}")
-                
-                # Update progress more frequently
-                progress_current_step += 1
-                await progress_callback(progress_current_step, progress_total_steps)
-                await asyncio.sleep(0.01)  # Small sleep to allow UI update
-
-        driver.quit()
-
-        # Save the data in a CSV file
-        keys = products[0].keys()
-        file_path = 'products.csv'
+    async def store_products(self, products, csv_path):
+        loop = asyncio.get_running_loop()
+        if self.catalog_store is not None:
+            await loop.run_in_executor(None, self.catalog_store.upsert_products, products)
+        # Search-term scrapes only update the store; nothing reads a snapshot of products.csv
+        if csv_path != CATALOG_FILE:
+            return
+        if self.release_snapshot is not None:
+            self.release_snapshot()
+        await loop.run_in_executor(None, self.save_snapshot, products, csv_path)
+
+    def save_snapshot(self, products, csv_path):
+        # Columnar copy next to the CSV. The embedding column is only written when every product is
+        # already in the embedding cache, so after a scan that found new products it is usually absent.
+        # Imported here so pandas and pyarrow load on the first scrape rather than at startup.
+        from src.catalog.snapshot import snapshot_path, write_snapshot
+        from src.optimizer.embedding_cache import get_embedding_cache, product_text
+        from src.optimizer.semantic_search import MODEL_NAME
+        embeddings = get_embedding_cache(MODEL_NAME).lookup([product_text(product) for product in products])
         try:
-            with open(file_path, 'w', newline='', encoding='utf-8') as output_file:
-                dict_writer = csv.DictWriter(output_file, fieldnames=keys)
-                dict_writer.writeheader()
-                dict_writer.writerows(products)
-            print(f"File saved successfully at {os.path.abspath(file_path)}")
+            write_snapshot(products, snapshot_path(csv_path), embeddings)
         except Exception as e:
-            print(f"Error saving file: {e}")
-
-        return products
-
-    async def scrape_all_products(self, progress_callback):
-        service = Service(ChromeDriverManager().install())
-        options = webdriver.ChromeOptions()
-        options.add_argument('--headless')
-        driver = webdriver.Chrome(service=service, options=options)
-
-        url = 'https://www.supermarket23.com/en/productos'
-        driver.get(url)
-
-        WebDriverWait(driver, 10).until(EC.presence_of_all_elements_located((By.CLASS_NAME, 'single_product')))
-
-        total_results_element = driver.find_element(By.XPATH, '//p[contains(text(),"Showing")]')
-        total_results_text = total_results_element.text
-        total_results = int(total_results_text.split()[-2])
-        results_per_page = 20
-        total_pages = (total_results // results_per_page) + 1
-
-        products = []
-        progress_total_steps = total_pages * results_per_page
-        progress_current_step = 0
-
-        for page in range(1, total_pages + 1):
-            if page > 1:
-                page_url = f"{url}?pagina={page}"
-                driver.get(page_url)
-                WebDriverWait(driver, 10).until(EC.presence_of_all_elements_located((By.CLASS_NAME, 'single_product')))
-            
-            product_elements = driver.find_elements(By.CLASS_NAME, 'single_product')
-
-            for product in product_elements:
-                try:
-                    name_element = WebDriverWait(product, 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, 'h3 > a')))
-                    price_element = product.find_elements(By.CSS_SELECTOR, 'span.current_price')
-                    if not price_element:
-                        price_element = product.find_elements(By.CSS_SELECTOR, 'span.regular_price')
-                    old_price_element = product.find_elements(By.CSS_SELECTOR, 'span.old_price')
-                    price_by_weight_element = product.find_elements(By.CSS_SELECTOR, 'span.price-by-weight')
-                    
-                    name = name_element.get_attribute('innerText').strip() if name_element else "No name found"
-                    price = price_element[0].get_attribute('innerText').strip() if price_element else "No price found"
-                    old_price = old_price_element[0].get_attribute('innerText').strip() if old_price_element else "No old price found"
-                    price_by_weight = price_by_weight_element[0].get_attribute('innerText').strip() if price_by_weight_element else "No price by weight found"
-                    link = product.find_element(By.CSS_SELECTOR, 'div.product_thumb > a').get_attribute('href')
-                    
-                    product_number = link.split('/')[-1]
-                    image_url = f"https://medias.treew.com/imgproducts/middle/{product_number}.jpg"
-                    print(f"Product: {name}, Image URL: {image_url}")  # Debug message
-                    
-                    product_info = {
-                        'name': name,
-                        'price': float(price.replace('$', '').replace(',', '')),
-                        'old_price': float(old_price.replace('$', '').replace(',', '')) if old_price != "No old price found" else None,
-                        'price_by_weight': price_by_weight,
-                        'link': link,
-                        'image_url': image_url
-                    }
-                    products.append(product_info)
-                except Exception as e:
-                    print(f"Error processing product: {e}")
-                
-                # Update progress more frequently
-                progress_current_step += 1
-                await progress_callback(progress_current_step, progress_total_steps)
-                await asyncio.sleep(0.01)  # Small sleep to allow UI update
-
-        driver.quit()
-
-        # Save the data in a CSV file
-        keys = products[0].keys()
-        file_path = 'all_products.csv'
+            print(f"Error writing columnar snapshot: {e}")
+
+    async def scrape_to_file(self, target, file_path, progress_callback):
+        # Pages are appended to file_path as they arrive; an interrupted scrape of the same target resumes
+        loop = asyncio.get_running_loop()
+        writer = CheckpointedWriter(file_path, target_url(target))
+        done_pages = await loop.run_in_executor(None, writer.start)
+        backend = self.backend.value
         try:
-            with open(file_path, 'w', newline='', encoding='utf-8') as output_file:
-                dict_writer = csv.DictWriter(output_file, fieldnames=keys)
-                dict_writer.writeheader()
-                dict_writer.writerows(products)
-            print(f"File saved successfully at {os.path.abspath(file_path)}")
+            product_count = await self.engine.scrape(target, progress_callback, backend, fallback=False, on_page=writer.write_page, done_pages=done_pages)
+            fall_back = not product_count and not done_pages
+            if fall_back and backend != FALLBACK_BACKEND:
+                print(f"Backend '{backend}' found no products, falling back to {FALLBACK_BACKEND}")
         except Exception as e:
-            print(f"Error saving file: {e}")
-
+            if backend == FALLBACK_BACKEND:
+                raise
+            print(f"Backend '{backend}' failed ({e}), falling back to {FALLBACK_BACKEND}")
+            fall_back = True
+        if fall_back and backend != FALLBACK_BACKEND:
+            # The fallback starts over with a fresh file and checkpoint, so it does not skip
+            # pages the first backend recorded
+            done_pages = await loop.run_in_executor(None, partial(writer.start, resume=False))
+            await self.engine.scrape(target, progress_callback, FALLBACK_BACKEND, fallback=False, on_page=writer.write_page, done_pages=done_pages)
+        self.failed_pages = sorted(writer.failed_pages)
+        if not self.failed_pages:
+            await loop.run_in_executor(None, writer.finish)
+        else:
+            # Keep the checkpoint so the next scrape of this target fetches only the failed pages
+            print(f"Pages {self.failed_pages} failed; {file_path} holds the other pages, scrape again to fetch them")
+        return await loop.run_in_executor(None, writer.read_products)
+
+    async def scrape_incremental(self, file_path, progress_callback):
+        # Delta crawl of the full catalog against the previous scan; a first scan is a full one
+        loop = asyncio.get_running_loop()
+        snapshot = await loop.run_in_executor(None, load_snapshot, file_path)
+        if not snapshot:
+            return await self.scrape_to_file(None, file_path, progress_callback)
+        products = await self.engine.scrape(
+            None, progress_callback, self.backend.value,
+            stop_when=partial(page_has_nothing_new, snapshot), stop_after=DEFAULT_STOP_AFTER,
+        )
+        products = merge_into_snapshot(snapshot, products)
+        await loop.run_in_executor(None, save_products_csv, products, file_path)
         return products